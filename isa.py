@@ -44,6 +44,12 @@ class Register(str, Enum):
     SP = 'sp'
 
 
+R0, R1, R2, R3, R4, PC, SP = range(7)
+
+opcode2tag = {opcode.value: tag for tag, opcode in enumerate(Opcode)}
+register2index = {register.value: index for index, register in enumerate(Register)}
+
+
 class OperandType(str, Enum):
     """Enum типов операндов в инструкциях процессора"""
     REGISTER = 'reg'
@@ -64,15 +70,15 @@ def read_code(filename):
     for i, cell in enumerate(program["data"]):
         program["data"][i] = int(cell)
     for instr in code:
-        instr['opcode'] = Opcode(instr['opcode'])
+        instr['opcode'] = opcode2tag[instr['opcode']]
         if 'arg1' in instr:
-            instr['arg1'] = Register(instr['arg1'])
+            instr['arg1'] = register2index[instr['arg1']]
         if 'arg2_type' in instr:
             instr['arg2_type'] = OperandType(instr['arg2_type'])
             if instr['arg2_type'] is OperandType.REGISTER:
-                instr['arg2'] = Register(instr['arg2'])
+                instr['arg2'] = register2index[instr['arg2']]
             else:
                 instr['arg2'] = int(instr['arg2'])
         if 'out' in instr:
-            instr['out'] = Register(instr['out'])
+            instr['out'] = register2index[instr['out']]
     return {"code": code, "data": program["data"]}
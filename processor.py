@@ -1,39 +1,29 @@
 """
 Модуль, эмулирующий работу процессора
 """
+import heapq
 import json
 import logging
 import sys
-from enum import Enum
+from array import array
 
-from isa import Opcode, Register, OperandType, read_code
+from isa import Opcode, Register, OperandType, read_code, opcode2tag, R0, R1, R2, R3, R4, PC, SP
 
 DATA_MEM_SZ = 10000
 
 
-class AluOperations(str, Enum):
-    """Enum операций для АЛУ"""
-    DIV = 'r0'
-    MOD = 'r1'
-    CMP = 'r2'
-    ADD = 'r3'
-    INC = 'r4'
-    DEC = 'pc'
-    SUB = 'sp'
-    MUL = 'mul'
-    LEFT = 'left'
-    RIGHT = 'right'
-    NOP = 'nop'
+class AluOperations:
+    """Коды операций для АЛУ, индексы в Alu.operations"""
+    DIV, MOD, CMP, ADD, INC, DEC, SUB, MUL, LEFT, RIGHT, NOP = range(11)
 
 
-opcode2alu = {
-    Opcode.DIV: AluOperations.DIV,
-    Opcode.MOD: AluOperations.MOD,
-    Opcode.CMP: AluOperations.CMP,
-    Opcode.ADD: AluOperations.ADD,
-    Opcode.SUB: AluOperations.SUB,
-    Opcode.MUL: AluOperations.MUL,
-}
+def wrap_word(value: int) -> int:
+    """Привести значение к 32-битному знаковому машинному слову (дополнительный код)"""
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+opcode_names = [opcode.value for opcode in Opcode]
+register_names = [register.value for register in Register]
 
 
 class Alu:
@@ -42,19 +32,19 @@ class Alu:
     def __init__(self):
         self.left: int = 0
         self.right: int = 0
-        self.operations: dict = {
-            AluOperations.DIV: lambda left, right: left / right,
-            AluOperations.MOD: lambda left, right: left % right,
-            AluOperations.CMP: lambda left, right: left - right,
-            AluOperations.ADD: lambda left, right: left + right,
-            AluOperations.INC: lambda left, right: left + 1,
-            AluOperations.DEC: lambda left, right: left - 1,
-            AluOperations.SUB: lambda left, right: left - right,
-            AluOperations.MUL: lambda left, right: left * right,
-            AluOperations.LEFT: lambda left, right: left,
-            AluOperations.RIGHT: lambda left, right: right,
-            AluOperations.NOP: lambda left, right: 0
-        }
+        self.operations: tuple = (
+            lambda left, right: int(left / right),  # DIV
+            lambda left, right: left % right,  # MOD
+            lambda left, right: left - right,  # CMP
+            lambda left, right: left + right,  # ADD
+            lambda left, right: left + 1,  # INC
+            lambda left, right: left - 1,  # DEC
+            lambda left, right: left - right,  # SUB
+            lambda left, right: left * right,  # MUL
+            lambda left, right: left,  # LEFT
+            lambda left, right: right,  # RIGHT
+            lambda left, right: 0,  # NOP
+        )
         self.zero_flag = True
 
 
@@ -62,25 +52,15 @@ class RegFile:
     """Класс эмулирующий регистровый файл"""
 
     def __init__(self):
-        self.registers = {
-            Register.R0: 0,
-            Register.R1: 0,
-            Register.R2: 0,
-            Register.R3: 0,
-            Register.R4: 0,
-            Register.PC: 0,
-            Register.SP: DATA_MEM_SZ
-        }
-        self.operand_1 = Register.R0
-        self.operand_2 = Register.R0
-        self.output = Register.R1
+        self.registers: list[int] = [0] * len(Register)
+        self.registers[SP] = DATA_MEM_SZ
 
 
 class DataPath:
     """Класс, эмулирующий тракт данных, предоставляющий интерфейс для CU"""
 
-    def __init__(self, data_memory, output_int: bool):
-        self.data_memory: list[int] = data_memory
+    def __init__(self, data_memory):
+        self.data_memory: array = data_memory
         self.reg_file = RegFile()
         self.alu = Alu()
         self.alu_bus: int = 0
@@ -88,37 +68,24 @@ class DataPath:
         self.data_bus: int = 0
         self.input_buffer = []
         self.input_pointer = 0
-        self.output_buffer = []
-        self.output_int = output_int
-
-    def latch_registers(self, operand_1, operand_2=Register.R0, output=Register.R1):
-        """Метод для выбора набора регистров из регистрового файла для инструкции"""
-        self.reg_file.operand_1 = operand_1
-        self.reg_file.operand_2 = operand_2
-        if output == Register.R0:
-            raise MemoryError("can't write to r0")
-        self.reg_file.output = output
-
-    def latch_alu(self, const_operand=None):
-        """Метод для эмуляции ввода данных в АЛУ"""
-        self.alu.left = self.reg_file.registers[self.reg_file.operand_1]
-        if const_operand is not None:
-            self.alu.right = const_operand
-        else:
-            self.alu.right = self.reg_file.registers[self.reg_file.operand_2]
-        self.data_bus = self.reg_file.registers[self.reg_file.operand_2]
+        self.output_buffer: list[int] = []
 
-    def latch_output(self):
-        """Метод для эмуляции вывода данных в регистры"""
-        self.reg_file.registers[self.reg_file.output] = self.output_bus
+    def latch_alu(self, operand_1, operand_2=R0, const_operand=None):
+        """Метод для эмуляции ввода данных в АЛУ: на левый вход подается регистр operand_1,
+        на правый -- const_operand, если он задан, иначе регистр operand_2"""
+        registers = self.reg_file.registers
+        self.alu.left = registers[operand_1]
+        self.data_bus = registers[operand_2]
+        self.alu.right = self.data_bus if const_operand is None else const_operand
 
-    def execute_alu(self, instruction: AluOperations):
+    def latch_output(self, output):
+        """Метод для эмуляции вывода данных с output_bus в регистр output"""
+        self.reg_file.registers[output] = self.output_bus
+
+    def execute_alu(self, instruction: int):
         """Метод для эмуляции исполнения CU"""
         res = self.alu.operations[instruction](self.alu.left, self.alu.right)
-        while res > 2147483647:
-            res = -2147483648 + (res - 2147483647)
-        while res < -2147483648:
-            res = 2147483647 - (res + 2147483648)
+        res = wrap_word(res)
         self.alu.zero_flag = (res == 0)
         self.alu_bus = res
         self.output_bus = res
@@ -131,25 +98,14 @@ class DataPath:
         """Метод для эмуляции сигнала чтения из памяти данных"""
         self.output_bus = self.data_memory[self.alu_bus]
 
-    def print(self):
-        """Метод для эмуляции сигнала вывода данных на внешнее устройство"""
-        if self.output_int:
-            self.output_buffer.append(self.alu_bus)
-        else:
-            self.output_buffer.append(chr(self.alu_bus))
-
     def input(self):
         """Метод для эмуляции сигнала ввода данных с внешнего устройства"""
-        try:
-            self.output_bus = ord(self.input_buffer[self.input_pointer])
-        except KeyError as exc:
-            raise EOFError() from exc
+        if self.input_pointer >= len(self.input_buffer):
+            raise EOFError()
+        value = self.input_buffer[self.input_pointer]
+        self.output_bus = wrap_word(value if isinstance(value, int) else ord(value))
         self.input_pointer += 1
 
-    def get_zero_flag(self) -> bool:
-        """Метод для получения Zero флага"""
-        return self.alu.zero_flag
-
 
 class ControlUnit:
     """Блок управления процессора. Выполняет декодирование инструкций и
@@ -157,16 +113,43 @@ class ControlUnit:
     """
 
     def __init__(self, program, data_path, interrupt_queue):
-        self.instr = None
         self.program: list = program
-        self.int_queue: dict = interrupt_queue
+        self.int_queue: list = interrupt_queue
         self.data_path: DataPath = data_path
-        self._sig_branch = False
         self.interrupt_vector = [0]
         self._tick: int = 0
         self.is_interrupted: bool = False
         self.int_enabled: bool = False
+        # Прерывание может произойти: прерывания разрешены, не обрабатывается
+        # другое прерывание и очередь запросов не пуста
+        self._irq_armed: bool = False
         self.instr_cnt = 0
+        self.instr_addr = None
+        self._registers: list[int] = data_path.reg_file.registers
+        self._memory: array = data_path.data_memory
+        # Пары обработчиков (arg2 - регистр, arg2 - константа)
+        handlers = {
+            Opcode.DECLARE: (self._exec_nop, self._exec_nop),
+            Opcode.LD: (self._exec_ld_rr, self._exec_ld_rc),
+            Opcode.SV: (self._exec_sv_rr, self._exec_sv_rc),
+            Opcode.OUT: (self._exec_out_rr, self._exec_out_rc),
+            Opcode.IN: (self._exec_in, self._exec_in),
+            Opcode.ADD: (self._exec_add_rr, self._exec_add_rc),
+            Opcode.SUB: (self._exec_sub_rr, self._exec_sub_rc),
+            Opcode.MUL: (self._exec_mul_rr, self._exec_mul_rc),
+            Opcode.DIV: (self._exec_div_rr, self._exec_div_rc),
+            Opcode.MOD: (self._exec_mod_rr, self._exec_mod_rc),
+            Opcode.CMP: (self._exec_sub_rr, self._exec_sub_rc),
+            Opcode.JMP: (self._exec_jmp_rr, self._exec_jmp_rc),
+            Opcode.JE: (self._exec_je_rr, self._exec_je_rc),
+            Opcode.JNE: (self._exec_jne_rr, self._exec_jne_rc),
+            Opcode.IRET: (self._exec_iret, self._exec_iret),
+            Opcode.STI: (self._exec_sti, self._exec_sti),
+            Opcode.CLI: (self._exec_cli, self._exec_cli),
+            Opcode.HLT: (self._exec_hlt, self._exec_hlt),
+        }
+        self._dispatch: list = [handlers[opcode] for opcode in Opcode]
+        self.decoded: list = self.decode(program)
 
     def tick(self) -> None:
         """Счётчик тактов процессора. Вызывается при переходе на следующий такт."""
@@ -176,167 +159,292 @@ class ControlUnit:
         """Получить номер текущего такта"""
         return self._tick
 
-    def latch_program_counter(self) -> None:
-        """Инкрементировать счетчик команд"""
-        self.data_path.reg_file.registers[Register.PC] += 1
-
-    def decode_and_execute_instruction(self):
-        """Выбрать из памяти инструкцию и выполнить ее"""
-        if self.int_enabled and not self.is_interrupted and len(self.int_queue) != 0 \
-                and self._tick >= min(self.int_queue.keys()):
-            interrupt = self.int_queue[min(self.int_queue.keys())]
-            del self.int_queue[min(self.int_queue.keys())]
-            self.data_path.latch_registers(Register.SP, Register.PC)
-            self.data_path.latch_alu()
-            self.data_path.execute_alu(AluOperations.LEFT)
-            self.data_path.write()
-            self.tick()
-            self.data_path.latch_registers(Register.SP, output=Register.SP)
-            self.data_path.latch_alu()
-            self.data_path.execute_alu(AluOperations.DEC)
-            self.data_path.latch_output()
-            self.tick()
-            self.data_path.latch_registers(Register.R0, output=Register.PC)
-            self.data_path.latch_alu(self.interrupt_vector[0])
-            self.data_path.execute_alu(AluOperations.RIGHT)
-            self.data_path.read()
-            self.data_path.latch_output()
-            self.tick()
-            self.data_path.input_buffer.append(interrupt)
-            self.is_interrupted = True
-
-        instr = self.program[self.data_path.reg_file.registers[Register.PC]]
-        self.instr = instr
-        opcode = instr["opcode"]
-        self.instr_cnt += 1
-
-        if opcode is Opcode.HLT:
-            raise StopIteration()
-
-        if opcode is Opcode.IRET:
-            self.data_path.latch_registers(Register.SP, output=Register.SP)
-            self.data_path.latch_alu()
-            self.data_path.execute_alu(AluOperations.INC)
-            self.data_path.latch_output()
-            self.tick()
-            self.data_path.latch_registers(Register.SP, output=Register.PC)
-            self.data_path.latch_alu()
-            self.data_path.execute_alu(AluOperations.LEFT)
-            self.data_path.read()
-            self.data_path.latch_output()
-            self.tick()
-            self.is_interrupted = False
-            return
-
-        if opcode in [Opcode.JNE, Opcode.JE, Opcode.JMP]:
-            if opcode is not Opcode.JMP:
-                self.data_path.latch_registers(instr["arg1"], Register.R0)
-                self.data_path.latch_alu()
-                self.data_path.execute_alu(AluOperations.CMP)
-                self.tick()
-            if opcode is opcode.JMP or opcode is Opcode.JE and self.data_path.get_zero_flag() \
-                    or opcode is Opcode.JNE and not self.data_path.get_zero_flag():
-                if instr["arg2_type"] is OperandType.CONSTANT:
-                    self.data_path.latch_registers(Register.R0, output=Register.PC)
-                    self.data_path.latch_alu(instr["arg2"])
-                else:
-                    self.data_path.latch_registers(Register.R0, instr["arg2"], Register.PC)
-                    self.data_path.latch_alu()
-                self.data_path.execute_alu(AluOperations.RIGHT)
-                self.data_path.latch_output()
-                self.tick()
-                return
-
-        elif opcode is Opcode.OUT:
-            if instr["arg2_type"] is OperandType.CONSTANT:
-                self.data_path.latch_registers(Register.R0)
-                self.data_path.latch_alu(instr["arg2"])
-            else:
-                self.data_path.latch_registers(Register.R0, instr["arg2"])
-                self.data_path.latch_alu()
-            self.data_path.execute_alu(AluOperations.RIGHT)
-            self.data_path.print()
-            self.tick()
-
-        elif opcode is Opcode.IN:
-            self.data_path.latch_registers(Register.R0, output=instr["arg2"])
-            self.data_path.latch_alu()
-            self.data_path.execute_alu(AluOperations.NOP)
-            self.data_path.input()
-            self.data_path.latch_output()
-            self.tick()
-
-        elif opcode in [Opcode.ADD, Opcode.CMP, Opcode.MUL, Opcode.DIV, Opcode.MOD, Opcode.SUB]:
-            if instr["arg2_type"] is OperandType.REGISTER:
-                self.data_path.latch_registers(instr["arg1"], operand_2=instr["arg2"], output=instr["out"])
-                self.data_path.latch_alu()
-            else:
-                self.data_path.latch_registers(instr["arg1"], output=instr["out"])
-                self.data_path.latch_alu(instr["arg2"])
-            self.data_path.execute_alu(opcode2alu.get(instr["opcode"]))
-            self.data_path.latch_output()
-            self.tick()
-
-        elif opcode is Opcode.LD:
-            if instr["arg2_type"] is OperandType.REGISTER:
-                self.data_path.latch_registers(instr["arg2"], Register.R0, instr["out"])
-                self.data_path.latch_alu()
-            else:
-                self.data_path.latch_registers(Register.R0, Register.R0, instr["out"])
-                self.data_path.latch_alu(const_operand=instr["arg2"])
-            self.data_path.execute_alu(AluOperations.RIGHT)
-            self.data_path.read()
-            self.data_path.latch_output()
-            self.tick()
-
-        elif opcode is Opcode.SV:
-            if instr["arg2_type"] is OperandType.REGISTER:
-                self.data_path.latch_registers(instr["arg2"], instr["arg1"])
-                self.data_path.latch_alu()
-                self.data_path.execute_alu(AluOperations.LEFT)
-            else:
-                self.data_path.latch_registers(Register.R0, instr["arg1"])
-                self.data_path.latch_alu(const_operand=instr["arg2"])
-                self.data_path.execute_alu(AluOperations.RIGHT)
-            self.data_path.write()
-            self.tick()
-
-        elif opcode in [Opcode.STI, Opcode.CLI]:
-            self.int_enabled = (opcode == Opcode.STI)
-            self.tick()
-
-        self.latch_program_counter()
+    def decode(self, program) -> list:
+        """Предекодировать программу: для каждой инструкции построить кортеж
+        (обработчик, arg1, arg2, out), индексируемый по PC. Обработчик выбирается
+        по коду операции и типу второго операнда, константы приводятся к машинному слову"""
+        decoded = []
+        for instr in program:
+            is_const = instr.get("arg2_type") == OperandType.CONSTANT
+            handler = self._dispatch[instr["opcode"]][is_const]
+            target = instr.get("arg2") if instr["opcode"] == opcode2tag[Opcode.IN.value] else instr.get("out")
+            if target == R0:
+                handler = self._exec_write_r0
+            arg2 = instr.get("arg2")
+            if is_const:
+                # Константа подается на вход АЛУ и проходит через него как машинное слово
+                arg2 = wrap_word(arg2)
+            decoded.append((handler, instr.get("arg1"), arg2, instr.get("out")))
+        return decoded
+
+    def run(self, limit) -> int:
+        """Выполнять инструкции до остановки процессора.
+
+        Возвращает количество выполненных инструкций, при превышении limit
+        выбрасывает AssertionError.
+        """
+        regs = self._registers
+        decoded = self.decoded
+        instr_counter = 0
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if debug:
+            logging.debug('%s', self)
+        try:
+            for instr_counter in range(limit):
+                if self._irq_armed and self.int_queue[0][0] <= self._tick:
+                    self._enter_interrupt()
+                pc = regs[PC]
+                self.instr_addr = pc
+                self.instr_cnt += 1
+                handler, arg1, arg2, out = decoded[pc]
+                handler(arg1, arg2, out)
+                if debug:
+                    logging.debug('%s', self)
+            raise AssertionError("too long execution, increase limit!")
+        except EOFError:
+            logging.warning('Input buffer is empty!')
+        except MemoryError:
+            logging.warning('Can not write to read-only register!')
+        except StopIteration:
+            pass
+        return instr_counter
+
+    def _update_irq_armed(self):
+        self._irq_armed = self.int_enabled and not self.is_interrupted and bool(self.int_queue)
+
+    def _enter_interrupt(self):
+        _, interrupt = heapq.heappop(self.int_queue)
+        self.data_path.latch_alu(SP, PC)
+        self.data_path.execute_alu(AluOperations.LEFT)
+        self.data_path.write()
+        self.tick()
+        self.data_path.latch_alu(SP)
+        self.data_path.execute_alu(AluOperations.DEC)
+        self.data_path.latch_output(SP)
+        self.tick()
+        self.data_path.latch_alu(R0, const_operand=self.interrupt_vector[0])
+        self.data_path.execute_alu(AluOperations.RIGHT)
+        self.data_path.read()
+        self.data_path.latch_output(PC)
+        self.tick()
+        self.data_path.input_buffer.append(interrupt)
+        self.is_interrupted = True
+        self._irq_armed = False
+
+    def _exec_nop(self, *_):
+        self._registers[PC] += 1
+
+    def _exec_hlt(self, *_):
+        raise StopIteration()
+
+    def _exec_write_r0(self, *_):
+        raise MemoryError("can't write to r0")
+
+    def _exec_iret(self, *_):
+        self.data_path.latch_alu(SP)
+        self.data_path.execute_alu(AluOperations.INC)
+        self.data_path.latch_output(SP)
+        self.tick()
+        self.data_path.latch_alu(SP)
+        self.data_path.execute_alu(AluOperations.LEFT)
+        self.data_path.read()
+        self.data_path.latch_output(PC)
+        self.tick()
+        self.is_interrupted = False
+        self._update_irq_armed()
+
+    def _exec_jmp_rr(self, _arg1, arg2, _out):
+        regs = self._registers
+        regs[PC] = regs[arg2]
+        self._tick += 1
+
+    def _exec_jmp_rc(self, _arg1, arg2, _out):
+        regs = self._registers
+        regs[PC] = arg2
+        self._tick += 1
+
+    def _exec_je_rr(self, arg1, arg2, _out):
+        regs = self._registers
+        if regs[arg1] == 0:
+            regs[PC] = regs[arg2]
+            self._tick += 2
+        else:
+            regs[PC] += 1
+            self._tick += 1
+
+    def _exec_je_rc(self, arg1, arg2, _out):
+        regs = self._registers
+        if regs[arg1] == 0:
+            regs[PC] = arg2
+            self._tick += 2
+        else:
+            regs[PC] += 1
+            self._tick += 1
+
+    def _exec_jne_rr(self, arg1, arg2, _out):
+        regs = self._registers
+        if regs[arg1] != 0:
+            regs[PC] = regs[arg2]
+            self._tick += 2
+        else:
+            regs[PC] += 1
+            self._tick += 1
+
+    def _exec_jne_rc(self, arg1, arg2, _out):
+        regs = self._registers
+        if regs[arg1] != 0:
+            regs[PC] = arg2
+            self._tick += 2
+        else:
+            regs[PC] += 1
+            self._tick += 1
+
+    def _exec_out_rr(self, _arg1, arg2, _out):
+        regs = self._registers
+        self.data_path.output_buffer.append(regs[arg2])
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_out_rc(self, _arg1, arg2, _out):
+        regs = self._registers
+        self.data_path.output_buffer.append(arg2)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_in(self, _arg1, arg2, _out):
+        regs = self._registers
+        self.data_path.input()
+        regs[arg2] = self.data_path.output_bus
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_add_rr(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] + regs[arg2]
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_add_rc(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] + arg2
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_sub_rr(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] - regs[arg2]
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_sub_rc(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] - arg2
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_mul_rr(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] * regs[arg2]
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_mul_rc(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] * arg2
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_div_rr(self, arg1, arg2, out):
+        regs = self._registers
+        value = int(regs[arg1] / regs[arg2])
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_div_rc(self, arg1, arg2, out):
+        regs = self._registers
+        value = int(regs[arg1] / arg2)
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_mod_rr(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] % regs[arg2]
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_mod_rc(self, arg1, arg2, out):
+        regs = self._registers
+        value = regs[arg1] % arg2
+        regs[out] = wrap_word(value)
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_ld_rr(self, _arg1, arg2, out):
+        regs = self._registers
+        regs[out] = self._memory[regs[arg2]]
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_ld_rc(self, _arg1, arg2, out):
+        regs = self._registers
+        regs[out] = self._memory[arg2]
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_sv_rr(self, arg1, arg2, _out):
+        regs = self._registers
+        self._memory[regs[arg2]] = regs[arg1]
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_sv_rc(self, arg1, arg2, _out):
+        regs = self._registers
+        self._memory[arg2] = regs[arg1]
+        regs[PC] += 1
+        self._tick += 1
+
+    def _exec_sti(self, *_):
+        self.int_enabled = True
+        self._update_irq_armed()
+        self._registers[PC] += 1
+        self._tick += 1
+
+    def _exec_cli(self, *_):
+        self.int_enabled = False
+        self._irq_armed = False
+        self._registers[PC] += 1
+        self._tick += 1
 
     def __repr__(self):
-        data_memory = self.data_path.data_memory[self.data_path.reg_file.registers[Register.SP]]
-        frmt = "{{INSTR: {}, TICK: {}, PC: {}, R0: {}, R1: {}, R2: {}, R3: {}, R4: {}, SP: {}, MEM[SP]: {}, OP1: {}, OP2: {}, OUT: {}, INT: {}}}"
-        state = frmt.format(
-            self.instr_cnt,
-            self.current_tick(),
-            self.data_path.reg_file.registers[Register.PC],
-            self.data_path.reg_file.registers[Register.R0],
-            self.data_path.reg_file.registers[Register.R1],
-            self.data_path.reg_file.registers[Register.R2],
-            self.data_path.reg_file.registers[Register.R3],
-            self.data_path.reg_file.registers[Register.R4],
-            self.data_path.reg_file.registers[Register.SP],
-            data_memory,
-            self.data_path.reg_file.operand_1,
-            self.data_path.reg_file.operand_2,
-            self.data_path.reg_file.output,
-            self.is_interrupted,
+        regs = self._registers
+        state = (
+            f"{{INSTR: {self.instr_cnt}, TICK: {self._tick}, PC: {regs[PC]}, "
+            f"R0: {regs[R0]}, R1: {regs[R1]}, R2: {regs[R2]}, R3: {regs[R3]}, R4: {regs[R4]}, "
+            f"SP: {regs[SP]}, MEM[SP]: {self._memory[regs[SP]]}, INT: {self.is_interrupted}}}"
         )
-        if self.instr:
+        if self.instr_addr is not None:
+            instr = self.program[self.instr_addr]
             arg1 = ''
             arg2 = ''
             out = ''
-            if 'out' in self.instr:
-                out = self.instr['out']
-            if 'arg1' in self.instr:
-                arg1 = self.instr['arg1']
-            if 'arg2' in self.instr:
-                arg2 = self.instr['arg2']
-            action = f"{self.instr['opcode']} {out} {arg1} {arg2}"
+            if 'out' in instr:
+                out = register_names[instr['out']]
+            if 'arg1' in instr:
+                arg1 = register_names[instr['arg1']]
+            if 'arg2' in instr:
+                arg2 = instr['arg2']
+                if instr['arg2_type'] == OperandType.REGISTER:
+                    arg2 = register_names[arg2]
+            action = f"{opcode_names[instr['opcode']]} {out} {arg1} {arg2}"
             return f"{state} {action}"
         return f"{state}"
 
@@ -345,35 +453,21 @@ def simulation(program, interrupt_queue, limit, output_int):
     """Запуск симуляции процессора.
 
     Длительность моделирования ограничена количеством выполненных инструкций.
+    interrupt_queue -- куча (heapq) пар (такт, значение) запросов прерывания.
     """
     code: list = program["code"]
     data: list = program["data"]
-    data_memory = [0] * (DATA_MEM_SZ + 2)
+    data_memory = array('i', [0] * (DATA_MEM_SZ + 2))
     for i in range(len(data)):
-        data_memory[i] = data[i]
-    data_path = DataPath(data_memory, output_int)
+        data_memory[i] = wrap_word(data[i])
+    data_path = DataPath(data_memory)
     control_unit = ControlUnit(code, data_path, interrupt_queue)
-    instr_counter = 0
-    logging.debug('%s', control_unit)
-    try:
-        while True:
-            assert limit > instr_counter, "too long execution, increase limit!"
-            control_unit.decode_and_execute_instruction()
-            instr_counter += 1
-            logging.debug('%s', control_unit)
-    except EOFError:
-        logging.warning('Input buffer is empty!')
-    except MemoryError:
-        logging.warning('Can not write to read-only register!')
-    except StopIteration:
-        pass
+    instr_counter = control_unit.run(limit)
     if not output_int:
-        buffer = ''.join(data_path.output_buffer)
+        buffer = ''.join(map(chr, data_path.output_buffer))
         logging.info('output_buffer: %s', repr(buffer))
     else:
-        buffer = ''
-        for data in data_path.output_buffer:
-            buffer += str(data)
+        buffer = ''.join(map(str, data_path.output_buffer))
         logging.info('output_buffer: %s', buffer)
     return buffer, instr_counter, control_unit.current_tick()
 
@@ -398,8 +492,9 @@ def launch_processor(args):
     program = read_code(code_file)
     with open(input_file, encoding="utf-8") as file:
         input_dict = json.loads(file.read())
-    interruption_dict = {int(key): value for key, value in input_dict.items()}
-    return simulation(program, interruption_dict, 100000, output_int)
+    interruption_heap = [(int(key), value) for key, value in input_dict.items()]
+    heapq.heapify(interruption_heap)
+    return simulation(program, interruption_heap, 100000, output_int)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,9 @@
+section text
+    add r1 r0 2147483647
+    add r1 r1 1
+    out r1
+    add r2 r0 7
+    sub r2 r0 r2
+    div r3 r2 2
+    out r3
+    out 4294967361
@@ -0,0 +1,6 @@
+section data
+big:
+    word 3000000000
+section text
+    ld r1 big
+    out r1
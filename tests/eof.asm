@@ -0,0 +1,4 @@
+section text
+    out 'a'
+    in r1
+    out r1
@@ -0,0 +1,11 @@
+section text
+    add r1 r0 'a'
+    jmp skip
+    out 'x'
+skip:
+    out r1
+    sub r2 r1 'a'
+    je r2 done
+    out 'y'
+done:
+    out 'b'
@@ -0,0 +1,11 @@
+section data
+    int 0 int_handler
+section text
+    sti
+    halt
+    int_handler:
+        in r1
+        sv r1 100
+        ld r2 100
+        out r2
+        iret
@@ -0,0 +1,6 @@
+section text
+    add r1 r0 65
+    add r2 r0 5
+    sv r1 r2
+    ld r3 r2
+    out r3
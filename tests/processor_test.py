@@ -29,3 +29,32 @@ class ProcessorTest(unittest.TestCase):
     def test_var(self):
         output = self.start_machine("tests/var_test")[0]
         self.assertEqual(output, 'test')
+
+    def test_eof(self):
+        self.input = "tests/empty.json"
+        with self.assertLogs(level='WARNING') as logs:
+            output, instr_counter, _ = self.start_machine("tests/eof")
+        self.assertEqual(output, 'a')
+        self.assertEqual(instr_counter, 1)
+        self.assertIn('Input buffer is empty!', logs.output[0])
+
+    def test_ld_reg(self):
+        output = self.start_machine("tests/ld_reg")[0]
+        self.assertEqual(output, 'A')
+
+    def test_arith(self):
+        output = self.start_machine("tests/arith", "int")[0]
+        self.assertEqual(output, '-2147483648' + '-3' + '65')
+
+    def test_big_word(self):
+        output = self.start_machine("tests/big_word", "int")[0]
+        self.assertEqual(output, '-1294967296')
+
+    def test_forward(self):
+        output = self.start_machine("tests/forward")[0]
+        self.assertEqual(output, 'ab')
+
+    def test_int_input(self):
+        self.input = "tests/int_input.json"
+        output = self.start_machine("tests/int_input", "int")[0]
+        self.assertEqual(output, '-1294967296')
@@ -31,3 +31,27 @@ class TranslatorTest(unittest.TestCase):
 
     def test_var(self):
         self.simple_test("tests/var_test.asm", "tests/var_test.test", "tests/var_test")
+
+    def test_eof(self):
+        self.simple_test("tests/eof.asm", "tests/eof.test", "tests/eof")
+
+    def test_ld_reg(self):
+        self.simple_test("tests/ld_reg.asm", "tests/ld_reg.test", "tests/ld_reg")
+
+    def test_arith(self):
+        self.simple_test("tests/arith.asm", "tests/arith.test", "tests/arith")
+
+    def test_big_word(self):
+        self.simple_test("tests/big_word.asm", "tests/big_word.test", "tests/big_word")
+
+    def test_forward(self):
+        self.simple_test("tests/forward.asm", "tests/forward.test", "tests/forward")
+
+    def test_unknown_term(self):
+        with self.assertRaisesRegex(SyntaxError, "term nowhere must be either register, integer or char"):
+            translation.translate("section text\nadd nowhere r1 r2")
+        with self.assertRaisesRegex(SyntaxError, "term nowhere must be either register, integer or char"):
+            translation.translate("section text\njmp nowhere")
+
+    def test_int_input(self):
+        self.simple_test("tests/int_input.asm", "tests/int_input.test", "tests/int_input")
@@ -1,9 +1,8 @@
 """Модуль трансляции ASM-кода в инструкции процессора"""
-import re
 import sys
 from enum import Enum
 
-from isa import Opcode, write_code, Register, OperandType, INTERRUPTION_VECTOR_SZ
+from isa import Opcode, write_code, OperandType, INTERRUPTION_VECTOR_SZ, R0, R1, R2, R3, R4, PC, SP
 
 
 class SectionState(str, Enum):
@@ -13,13 +12,13 @@ class SectionState(str, Enum):
 
 
 str2register = {
-    "r0": Register.R0,
-    "r1": Register.R1,
-    "r2": Register.R2,
-    "r3": Register.R3,
-    "r4": Register.R4,
-    "sp": Register.SP,
-    "pc": Register.PC,
+    "r0": R0,
+    "r1": R1,
+    "r2": R2,
+    "r3": R3,
+    "r4": R4,
+    "sp": SP,
+    "pc": PC,
 }
 
 str2section = {
@@ -47,22 +46,64 @@ str2opcode = {
     "halt": Opcode.HLT
 }
 
+arithmetic_opcodes = frozenset({Opcode.ADD, Opcode.CMP, Opcode.MUL, Opcode.DIV, Opcode.MOD, Opcode.SUB})
+single_arg_opcodes = frozenset({Opcode.JMP, Opcode.OUT, Opcode.IN})
+branch_opcodes = frozenset({Opcode.JE, Opcode.JNE})
+memory_opcodes = frozenset({Opcode.SV, Opcode.LD})
+no_arg_opcodes = frozenset({Opcode.IRET, Opcode.CLI, Opcode.STI, Opcode.HLT})
+
+
+def tokenize(line):
+    """Разбить строку на термы по пробельным символам вне кавычек"""
+    terms = []
+    term = []
+    in_quotes = False
+    for char in line:
+        if char in "'\"":
+            in_quotes = not in_quotes
+            term.append(char)
+        elif char.isspace() and not in_quotes:
+            if term:
+                terms.append(''.join(term))
+                term = []
+        else:
+            term.append(char)
+    if term:
+        terms.append(''.join(term))
+    return terms
+
+
+def require_register(term, unresolved, message):
+    """Проверить, что терм -- регистр. Неизвестный терм на месте регистра не может
+    оказаться меткой, поэтому о нем сообщается сразу"""
+    if term in unresolved:
+        raise SyntaxError(f"term {term} must be either register, integer or char")
+    if term not in str2register.keys():
+        raise SyntaxError(message)
+
 
 def translate(script):
-    """Функция трансляции ASM кода в инструкции процессора"""
+    """Функция трансляции ASM кода в инструкции процессора.
+
+    Трансляция выполняется за один проход: ссылки на еще не объявленные метки
+    запоминаются в fixups и подставляются после прохода. Поэтому неизвестный терм
+    на месте константы обнаруживается только после прохода, и ошибка в количестве
+    аргументов той же строки сообщается раньше.
+    """
     labels = {}
     data_labels = {}
     code = []
     data = ["0"] * INTERRUPTION_VECTOR_SZ
-    instr_count = 0
     data_count = INTERRUPTION_VECTOR_SZ
+    code_fixups = []
+    data_fixups = []
     state = None
     for line in script.split("\n"):
         if line == '':
             continue
-        terms = re.split(r'\s+(?=(?:[^\'\"]*[\'\"][^\'\"]*[\'\"])*[^\'\"]*$)', line)
-        if terms[0] == '':
-            terms = terms[1:]
+        terms = tokenize(line)
+        if len(terms) == 0:
+            continue
         # Удаляем комментарии
         for i in range(len(terms)):
             terms[i] = str(terms[i])
@@ -79,97 +120,52 @@ def translate(script):
             raise SyntaxError("no active section")
         if state == SectionState.TEXT:
             if len(terms) == 1 and terms[0][-1] == ':':
-                labels[terms[0][0:-1]] = str(instr_count)
-                continue
-            instr_count += 1
-        elif state == SectionState.DATA:
-            if len(terms) == 1 and terms[0][-1] == ':':
-                data_labels[terms[0][0:-1]] = str(data_count)
-                continue
-            if terms[0] == "word":
-                if len(terms) != 2:
-                    raise SyntaxError("variable declaration must have 1 arg")
-                if len(terms[1]) == 3 and terms[1][0] == "'" and terms[1][2] == "'":
-                    terms[1] = str(ord(terms[1][1]))
-                elif not terms[1].isdigit():
-                    raise SyntaxError(f"invalid data: {terms[1]}. only ints and chars are supported.")
-                data.append(terms[1])
-                data_count += 1
-            elif terms[0] == "int":
+                labels[terms[0][0:-1]] = str(len(code))
                 continue
-            else:
-                raise SyntaxError(f"unknown instruction {terms[0]}. only word instruction is supported")
-    instr_count = 0
-    for line in script.split("\n"):
-        if line == '':
-            continue
-        line = line.strip()
-        terms = re.split(r'\s+(?=(?:[^\'\"]*[\'\"][^\'\"]*[\'\"])*[^\'\"]*$)', line)
-        if terms[0] == '':
-            terms = terms[1:]
-        if len(terms) == 0 or len(terms) == 1 and terms[0] == '':
-            continue
-        # Удаляем комментарии
-        for i in range(len(terms)):
-            terms[i] = str(terms[i])
-            if terms[i][0] == ';':
-                terms = terms[0:i]
-        if terms[0] == "section":
-            if not terms[1] in str2section:
-                raise SyntaxError(f"unknown section name {terms[1]}")
-            state = str2section.get(terms[1])
-            continue
-
-        if not state:
-            raise SyntaxError("no active section")
-        if state == SectionState.TEXT:
-            if len(terms) == 1 and terms[0][-1] == ':':
-                continue
-            command = str2opcode[terms[0]]
             if terms[0] not in str2opcode:
                 raise SyntaxError(f"unknown command {terms[0]}")
+            command = str2opcode[terms[0]]
+            unresolved = []
             for i, term in enumerate(terms):
                 if i == 0:
                     continue
                 if term in labels:
                     term = labels[term]
                 elif term in data_labels:
-                    if command in [Opcode.SV, Opcode.LD]:
+                    if command in memory_opcodes:
                         term = data_labels[term]
                     else:
                         raise SyntaxError(f"{term}: can only use labels from data section in ld and sv")
                 if len(term) == 3 and term[0] == "'" and term[2] == "'":
                     term = str(ord(term[1]))
                 if term not in str2register.keys() and not term.isdigit():
-                    raise SyntaxError(f"term {term} must be either register, integer or char")
+                    # Возможно, метка объявлена ниже: проверим после прохода
+                    unresolved.append(term)
                 terms[i] = term
-            if command in [Opcode.ADD, Opcode.CMP, Opcode.MUL, Opcode.DIV, Opcode.MOD, Opcode.SUB]:
+            if command in arithmetic_opcodes:
                 if len(terms) != 4:
                     raise SyntaxError(f"{command} command must have exactly 3 args")
-                if terms[1] not in str2register.keys():
-                    raise SyntaxError("output must be a register")
-                if terms[2] not in str2register.keys():
-                    raise SyntaxError("constants can only be second arguments")
+                require_register(terms[1], unresolved, "output must be a register")
+                require_register(terms[2], unresolved, "constants can only be second arguments")
                 if terms[3] not in str2register.keys():
                     code.append({'opcode': terms[0], 'arg1': terms[2],
                                  'arg2': terms[3], 'arg2_type': OperandType.CONSTANT, 'out': terms[1]})
                 else:
                     code.append({'opcode': terms[0], 'arg1': terms[2],
                                  'arg2': terms[3], 'arg2_type': OperandType.REGISTER, 'out': terms[1]})
-            elif command in [Opcode.JMP, Opcode.OUT, Opcode.IN]:
+            elif command in single_arg_opcodes:
                 if len(terms) != 2:
                     raise SyntaxError(f"{command} command must have exactly 1 arg")
+                if command is Opcode.IN:
+                    require_register(terms[1], unresolved, f"{command} command arg must be a register")
                 if terms[1] not in str2register.keys():
-                    if command is Opcode.IN:
-                        raise SyntaxError(f"{command} command arg must be a register")
                     code.append({'opcode': terms[0], 'arg2': terms[1], 'arg2_type': OperandType.CONSTANT})
                 else:
                     code.append({'opcode': terms[0], 'arg2': terms[1], 'arg2_type': OperandType.REGISTER})
-            elif command in [Opcode.JE, Opcode.JNE]:
+            elif command in branch_opcodes:
                 if len(terms) != 3:
                     raise SyntaxError(f"{command} command must have exactly 2 args")
-                if terms[1] not in str2register.keys():
-                    raise SyntaxError("arg1 must be a register")
+                require_register(terms[1], unresolved, "arg1 must be a register")
                 if terms[2] not in str2register.keys():
                     arg2_type = OperandType.CONSTANT
                 else:
@@ -179,8 +175,7 @@ def translate(script):
             elif command is Opcode.LD:
                 if len(terms) != 3:
                     raise SyntaxError(f"{command} command must have exactly 2 args")
-                if terms[1] not in str2register.keys():
-                    raise SyntaxError("output must be a register")
+                require_register(terms[1], unresolved, "output must be a register")
                 if terms[2] not in str2register.keys():
                     code.append({'opcode': terms[0], 'arg2': terms[2],
                                  'arg2_type': OperandType.CONSTANT, 'out': terms[1]})
@@ -190,34 +185,63 @@ def translate(script):
             elif command is Opcode.SV:
                 if len(terms) != 3:
                     raise SyntaxError(f"{command} command must have exactly 2 args")
-                if terms[1] not in str2register.keys():
-                    raise SyntaxError("data must a register")
+                require_register(terms[1], unresolved, "data must a register")
                 if terms[2] not in str2register.keys():
                     code.append({'opcode': terms[0], 'arg2': terms[2], 'arg2_type': OperandType.CONSTANT,
                                  'arg1': terms[1]})
                 else:
                     code.append({'opcode': terms[0], 'arg2': terms[2], 'arg2_type': OperandType.REGISTER,
                                  'arg1': terms[1]})
-            elif command in [Opcode.IRET, Opcode.CLI, Opcode.STI, Opcode.HLT]:
+            elif command in no_arg_opcodes:
                 code.append({'opcode': terms[0]})
             else:
                 raise SyntaxError(f"translator does not support command: {command}")
-            instr_count += 1
+            for term in unresolved:
+                code_fixups.append((len(code) - 1, term, command))
         elif state == SectionState.DATA:
-            for i, term in enumerate(terms):
-                if i == 0:
-                    continue
-                if term in labels:
-                    term = labels[term]
-                terms[i] = term
-            if terms[0] == 'int':
+            if len(terms) == 1 and terms[0][-1] == ':':
+                data_labels[terms[0][0:-1]] = str(data_count)
+                continue
+            if terms[0] == "word":
+                if len(terms) != 2:
+                    raise SyntaxError("variable declaration must have 1 arg")
+                if len(terms[1]) == 3 and terms[1][0] == "'" and terms[1][2] == "'":
+                    terms[1] = str(ord(terms[1][1]))
+                elif not terms[1].isdigit():
+                    raise SyntaxError(f"invalid data: {terms[1]}. only ints and chars are supported.")
+                data.append(terms[1])
+                data_count += 1
+            elif terms[0] == 'int':
+                for i, term in enumerate(terms):
+                    if i == 0:
+                        continue
+                    if term in labels:
+                        term = labels[term]
+                    terms[i] = term
                 if len(terms) != 3:
                     raise SyntaxError("interruption vector declaration must have 2 args")
                 if not terms[1].isdigit() or int(terms[1]) > INTERRUPTION_VECTOR_SZ - 1:
                     raise SyntaxError(f"interruption vector num must be from 0 to {INTERRUPTION_VECTOR_SZ}")
                 if not terms[2].isdigit():
-                    raise SyntaxError("interruption vector address must be int")
+                    data_fixups.append((int(terms[1]), terms[2]))
                 data[int(terms[1])] = terms[2]
+            else:
+                raise SyntaxError(f"unknown instruction {terms[0]}. only word instruction is supported")
+    for index, label, command in code_fixups:
+        if label in labels:
+            address = labels[label]
+        elif label in data_labels:
+            if command not in memory_opcodes:
+                raise SyntaxError(f"{label}: can only use labels from data section in ld and sv")
+            address = data_labels[label]
+        else:
+            raise SyntaxError(f"term {label} must be either register, integer or char")
+        if 'arg2' in code[index]:
+            code[index]['arg2'] = address
+    for index, label in data_fixups:
+        if label not in labels:
+            raise SyntaxError("interruption vector address must be int")
+        data[index] = labels[label]
     code.append({'opcode': Opcode.HLT})
     return {"code": code, "data": data}
 
@@ -238,7 +262,7 @@ def main(args):
         source = file.read()
 
     code = translate(source)
-    print("source LoC:", len(source.split("\n")), "code instr:", len(code["code"]))
+    print("source LoC:", source.count("\n") + 1, "code instr:", len(code["code"]))
     write_code(target, code)
 
 